@@ -2,20 +2,49 @@
 aare.ai - Azure Functions main entry point
 Verification endpoint using Z3 theorem prover
 """
+import asyncio
 import azure.functions as func
 import json
-import uuid
+import orjson
+import os
+import itertools
+import secrets
+import time
 import logging
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-from aare_core import OntologyLoader, LLMParser, SMTVerifier
+from handlers.llm_parser import LLMParser
+from handlers.ontology_loader import OntologyLoader
+from handlers.smt_verifier import POOL_SIZE, SMTVerifier
+
+logger = logging.getLogger(__name__)
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
 # Initialize components
-ontology_loader = OntologyLoader()
-llm_parser = LLMParser()
 smt_verifier = SMTVerifier()
+ontology_loader = OntologyLoader(compile_constraints=smt_verifier.compile_constraints)
+llm_parser = LLMParser()
+
+# Z3 releases the GIL while solving, so requests run on threads to overlap
+_EXECUTOR = ThreadPoolExecutor(max_workers=POOL_SIZE)
+
+DEFAULT_ONTOLOGY = "mortgage-compliance-v1"
+
+# Maximum number of items accepted by /verify_batch
+MAX_BATCH_ITEMS = 1000
+
+# Warm ontology and solver caches at worker startup instead of on first request
+PRELOAD_ONTOLOGIES = [DEFAULT_ONTOLOGY] + [
+    name.strip() for name in os.environ.get("PRELOAD_ONTOLOGIES", "").split(",") if name.strip()
+]
+for _ontology_name in PRELOAD_ONTOLOGIES:
+    smt_verifier.prewarm(ontology_loader.load(_ontology_name))
+
+# Verification IDs: a per-process prefix plus a counter, so no syscall per request.
+# The random part keeps IDs unique across instances that reuse the same PID.
+_ID_PREFIX = f"{os.getpid():x}{secrets.token_hex(4)}"
+_COUNTER = itertools.count()
 
 # CORS allowed origins
 ALLOWED_ORIGINS = [
@@ -26,26 +55,128 @@ ALLOWED_ORIGINS = [
 ]
 
 
+# CORS headers per allowed origin, built once (HttpResponse copies them).
+# Content-Type is set through the response mimetype instead.
+_CORS_HEADERS = {
+    origin: {
+        "Access-Control-Allow-Origin": origin,
+        "Access-Control-Allow-Headers": "Content-Type,x-api-key,x-functions-key",
+        "Access-Control-Allow-Methods": "OPTIONS,POST"
+    }
+    for origin in ALLOWED_ORIGINS
+}
+_DEFAULT_CORS = _CORS_HEADERS[ALLOWED_ORIGINS[0]]  # Default to primary domain
+
+
 def get_cors_headers(request: func.HttpRequest) -> dict:
-    """Generate CORS headers based on request origin"""
-    origin = request.headers.get("Origin", "")
+    """Return CORS headers based on request origin"""
+    return _CORS_HEADERS.get(request.headers.get("Origin", ""), _DEFAULT_CORS)
+
+
+def _json_response(body: dict, status_code: int, cors_headers: dict) -> func.HttpResponse:
+    """Build a JSON response from pre-encoded bytes, so the body is not re-encoded"""
+    try:
+        encoded = orjson.dumps(body)
+    except orjson.JSONEncodeError:
+        # orjson rejects integers beyond 64 bits, which an unbounded int extractor can produce
+        encoded = json.dumps(body).encode()
+    return func.HttpResponse(
+        encoded,
+        status_code=status_code,
+        mimetype="application/json",
+        headers=cors_headers
+    )
 
-    # Check if origin is allowed
-    if origin in ALLOWED_ORIGINS:
-        allowed_origin = origin
-    else:
-        allowed_origin = ALLOWED_ORIGINS[0]  # Default to primary domain
 
+def _static_responses(body: dict, status_code: int) -> dict:
+    """Build one JSON response per allowed origin for a fixed body, keyed by origin"""
     return {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Origin": allowed_origin,
-        "Access-Control-Allow-Headers": "Content-Type,x-api-key,x-functions-key",
-        "Access-Control-Allow-Methods": "OPTIONS,POST"
+        origin: _json_response(body, status_code, headers)
+        for origin, headers in _CORS_HEADERS.items()
+    }
+
+
+# Fixed responses, reused across requests
+_INVALID_JSON = _static_responses({"error": "Invalid JSON in request body"}, 400)
+_ITEM_ERRORS = {
+    message: _static_responses({"error": message}, 400)
+    for message in (
+        "llm_output is required",
+        "llm_output must be a string",
+        "ontology must be a string",
+    )
+}
+_OPTIONS_RESPONSES = {
+    origin: func.HttpResponse(b"", status_code=200, headers=headers)
+    for origin, headers in _CORS_HEADERS.items()
+}
+
+
+def _parse_body(req: func.HttpRequest):
+    """Parse the request body as a JSON object, or return None if it is not one"""
+    try:
+        req_body = orjson.loads(req.get_body())
+    except orjson.JSONDecodeError as e:
+        logger.error("Invalid request: %s", e)
+        return None
+    return req_body if isinstance(req_body, dict) else None
+
+
+def _validate_item(item: dict):
+    """Return the error message for an invalid verification item, or None if it is valid"""
+    llm_output = item.get("llm_output", "")
+    if not llm_output:
+        return "llm_output is required"
+    if not isinstance(llm_output, str):
+        return "llm_output must be a string"
+    if not isinstance(item.get("ontology", DEFAULT_ONTOLOGY), str):
+        return "ontology must be a string"
+    return None
+
+
+def _error_response(e: Exception, cors_headers: dict) -> func.HttpResponse:
+    """Build the 500 response for an unexpected verification error"""
+    logger.error("Verification error: %s", e)
+    return _json_response(
+        {
+            "error": str(e),
+            "type": type(e).__name__
+        },
+        500,
+        cors_headers
+    )
+
+
+def _ontology_snapshot(ontology: dict) -> dict:
+    """Return the response's ontology summary, stored on the (cached) ontology after first use"""
+    snapshot = ontology.get("_response_snapshot")
+    if snapshot is None:
+        snapshot = {
+            "name": ontology["name"],
+            "version": ontology["version"],
+            "constraints_checked": len(ontology["constraints"])
+        }
+        ontology["_response_snapshot"] = snapshot
+    return snapshot
+
+
+def _build_response_body(extracted_data: dict, ontology: dict, verification_result: dict) -> dict:
+    """Build the response body for one verification"""
+    return {
+        "verified": verification_result["verified"],
+        "violations": verification_result["violations"],
+        "parsed_data": extracted_data,
+        "ontology": _ontology_snapshot(ontology),
+        "proof": verification_result["proof"],
+        "solver": "Constraint Logic",
+        "verification_id": f"{_ID_PREFIX}-{next(_COUNTER):x}",
+        "execution_time_ms": verification_result["execution_time_ms"],
+        "timestamp": time.time_ns() // 1_000_000
     }
 
 
 @app.route(route="verify", methods=["POST", "OPTIONS"])
-def verify(req: func.HttpRequest) -> func.HttpResponse:
+async def verify(req: func.HttpRequest) -> func.HttpResponse:
     """
     HTTP trigger for aare.ai verification
 
@@ -55,31 +186,34 @@ def verify(req: func.HttpRequest) -> func.HttpResponse:
         "ontology": "ontology-name-v1"
     }
     """
-    logging.info("aare.ai verification request received")
+    logger.info("aare.ai verification request received")
 
     cors_headers = get_cors_headers(req)
 
     # Handle CORS preflight
     if req.method == "OPTIONS":
-        return func.HttpResponse(
-            "",
-            status_code=200,
-            headers=cors_headers
-        )
+        return _OPTIONS_RESPONSES[cors_headers["Access-Control-Allow-Origin"]]
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, _verify_request, req, cors_headers)
 
-    try:
-        # Parse request body
-        req_body = req.get_json()
-        llm_output = req_body.get("llm_output", "")
-        ontology_name = req_body.get("ontology", "mortgage-compliance-v1")
-
-        if not llm_output:
-            return func.HttpResponse(
-                json.dumps({"error": "llm_output is required"}),
-                status_code=400,
-                headers=cors_headers
-            )
 
+def _verify_request(req: func.HttpRequest, cors_headers: dict) -> func.HttpResponse:
+    """Parse, extract and verify a request on a worker thread"""
+    origin = cors_headers["Access-Control-Allow-Origin"]
+
+    # Validate input before entering the verification error handler
+    req_body = _parse_body(req)
+    if req_body is None:
+        return _INVALID_JSON[origin]
+
+    error = _validate_item(req_body)
+    if error is not None:
+        return _ITEM_ERRORS[error][origin]
+    llm_output = req_body["llm_output"]
+    ontology_name = req_body.get("ontology", DEFAULT_ONTOLOGY)
+
+    try:
         # Load ontology
         ontology = ontology_loader.load(ontology_name)
 
@@ -88,44 +222,75 @@ def verify(req: func.HttpRequest) -> func.HttpResponse:
 
         # Verify constraints using Z3
         verification_result = smt_verifier.verify(extracted_data, ontology)
+    except Exception as e:
+        return _error_response(e, cors_headers)
 
-        # Build response
-        response_body = {
-            "verified": verification_result["verified"],
-            "violations": verification_result["violations"],
-            "parsed_data": extracted_data,
-            "ontology": {
-                "name": ontology["name"],
-                "version": ontology["version"],
-                "constraints_checked": len(ontology["constraints"])
-            },
-            "proof": verification_result["proof"],
-            "solver": "Constraint Logic",
-            "verification_id": str(uuid.uuid4()),
-            "execution_time_ms": verification_result["execution_time_ms"],
-            "timestamp": datetime.utcnow().isoformat()
-        }
+    return _json_response(
+        _build_response_body(extracted_data, ontology, verification_result), 200, cors_headers
+    )
 
-        return func.HttpResponse(
-            json.dumps(response_body),
-            status_code=200,
-            headers=cors_headers
-        )
 
-    except ValueError as e:
-        logging.error(f"Invalid request: {str(e)}")
-        return func.HttpResponse(
-            json.dumps({"error": "Invalid JSON in request body"}),
-            status_code=400,
-            headers=cors_headers
+@app.route(route="verify_batch", methods=["POST", "OPTIONS"])
+async def verify_batch(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    HTTP trigger for aare.ai batch verification
+
+    Request body:
+    {
+        "items": [
+            {"llm_output": "text to verify", "ontology": "ontology-name-v1"},
+            ...
+        ]
+    }
+    """
+    logger.info("aare.ai batch verification request received")
+
+    cors_headers = get_cors_headers(req)
+
+    # Handle CORS preflight
+    if req.method == "OPTIONS":
+        return _OPTIONS_RESPONSES[cors_headers["Access-Control-Allow-Origin"]]
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, _verify_batch_request, req, cors_headers)
+
+
+def _verify_batch_request(req: func.HttpRequest, cors_headers: dict) -> func.HttpResponse:
+    """Parse, extract and verify a batch request on a worker thread"""
+    origin = cors_headers["Access-Control-Allow-Origin"]
+
+    # Validate input before entering the verification error handler
+    req_body = _parse_body(req)
+    if req_body is None:
+        return _INVALID_JSON[origin]
+
+    items = req_body.get("items")
+    if not isinstance(items, list) or not items:
+        return _json_response({"error": "items must be a non-empty list"}, 400, cors_headers)
+    if len(items) > MAX_BATCH_ITEMS:
+        return _json_response(
+            {"error": f"items exceeds the maximum of {MAX_BATCH_ITEMS}"}, 400, cors_headers
         )
+
+    # Group items by ontology so each group is solved in shared solver calls
+    results = [None] * len(items)
+    groups = {}
+    for index, item in enumerate(items):
+        error = _validate_item(item) if isinstance(item, dict) else "llm_output is required"
+        if error is not None:
+            results[index] = {"error": error}
+            continue
+        ontology_name = item.get("ontology", DEFAULT_ONTOLOGY)
+        groups.setdefault(ontology_name, []).append((index, item["llm_output"]))
+
+    try:
+        for ontology_name, entries in groups.items():
+            ontology = ontology_loader.load(ontology_name)
+            extracted = [llm_parser.parse(llm_output, ontology) for _, llm_output in entries]
+            verification_results = smt_verifier.verify_batch(extracted, ontology)
+            for (index, _), extracted_data, verification_result in zip(entries, extracted, verification_results):
+                results[index] = _build_response_body(extracted_data, ontology, verification_result)
     except Exception as e:
-        logging.error(f"Verification error: {str(e)}")
-        return func.HttpResponse(
-            json.dumps({
-                "error": str(e),
-                "type": type(e).__name__
-            }),
-            status_code=500,
-            headers=cors_headers
-        )
+        return _error_response(e, cors_headers)
+
+    return _json_response({"results": results}, 200, cors_headers)
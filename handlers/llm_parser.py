@@ -0,0 +1,161 @@
+"""
+LLM output parser for aare.ai (Azure Functions)
+Extends the aare-core parser to use regexes pre-compiled by OntologyLoader
+"""
+import re
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from aare_core import LLMParser as CoreLLMParser
+from aare_core.llm_parser import ConfidenceScores, ExtractionResult
+
+# Extractor types whose value is read straight from a regex match
+PATTERN_TYPES = {"int", "float", "money", "percentage", "string"}
+
+# ASCII characters Python's \s matches and RE2's does not
+_RE2_UNSAFE_TEXT = re.compile("[\v\x1c-\x1f]")
+
+# Inline flags turning case-insensitivity off, e.g. (?-i:...)
+_CASE_SENSITIVE_FLAG = re.compile(r"\(\?[a-zA-Z]*-[a-zA-Z]*i")
+
+
+class LLMParser(CoreLLMParser):
+    """Parses LLM output using the extractors pre-compiled by OntologyLoader"""
+
+    def __init__(self):
+        super().__init__()
+        # Keyword scan results and text properties for the parse in progress on each thread
+        self._local = threading.local()
+
+    def parse(self, text: str, ontology: Dict, include_confidence: bool = False) -> Dict[str, Any]:
+        """Parse LLM output, scanning boolean keywords in a single pass first"""
+        local = self._local
+        text_lower = text.lower()
+        # RE2 agrees with `re` only on ASCII text (str.isascii is O(1)) whose
+        # whitespace both engines' \s match
+        local.ascii = text_lower.isascii()
+        local.use_re2 = local.ascii and _RE2_UNSAFE_TEXT.search(text_lower) is None
+
+        automaton = ontology.get("_keyword_automaton")
+        if automaton is not None:
+            local.keyword_hits, local.keywords_seen = self._scan_keywords(text_lower, automaton)
+        try:
+            return super().parse(text, ontology, include_confidence)
+        finally:
+            local.keyword_hits = None
+            local.keywords_seen = None
+            local.ascii = False
+            local.use_re2 = False
+
+    def _scan_keywords(self, text_lower: str, automaton) -> Tuple[Set[int], Set[str]]:
+        """
+        Return the ids of keyword extractors that evaluate to True, and the keywords found.
+
+        Matches aare-core: an extractor is True if any of its keywords occurs
+        and, when negation checking applies, the keyword's first occurrence
+        has no negation word in context.
+        """
+        hits = set()
+        seen = set()
+        for end, (kw, extractors) in automaton.iter(text_lower):
+            if kw in seen:
+                continue
+            seen.add(kw)
+            start = end - len(kw) + 1
+            for extractor in extractors:
+                if id(extractor) in hits:
+                    continue
+                negation_words = extractor.get("negation_words", [])
+                if extractor.get("check_negation", True) and negation_words:
+                    if self._has_negation_in_context(text_lower, start, end + 1, negation_words):
+                        continue
+                hits.add(id(extractor))
+        return hits, seen
+
+    def _calculate_confidence(self, text: str, text_lower: str, extractor: Dict, value: Any) -> float:
+        """Calculate confidence, counting keyword matches from the keyword scan"""
+        seen = getattr(self._local, "keywords_seen", None)
+        if seen is None or not extractor.get("_keyword_indexed"):
+            return super()._calculate_confidence(text, text_lower, extractor, value)
+
+        # Same thresholds as aare-core, which counts duplicate keywords twice
+        matches = sum(1 for kw in extractor["keywords"] if kw in seen)
+        if matches >= 3:
+            return ConfidenceScores.KEYWORD_MULTIPLE
+        elif matches >= 2:
+            return ConfidenceScores.KEYWORD_DOUBLE
+        elif matches == 1:
+            return ConfidenceScores.KEYWORD_SINGLE
+        return ConfidenceScores.BOOLEAN_TRUE_NO_MATCH if value else ConfidenceScores.BOOLEAN_FALSE
+
+    def _find_source_text(self, text: str, text_lower: str, extractor: Dict, value: Any) -> str:
+        """Find the source text, taking the first keyword found by the keyword scan"""
+        seen = getattr(self._local, "keywords_seen", None)
+        if seen is None or not extractor.get("_keyword_indexed"):
+            return super()._find_source_text(text, text_lower, extractor, value)
+
+        return next((kw for kw in extractor["keywords"] if kw in seen), str(value))
+
+    def _extract_field_with_confidence(
+        self, text: str, text_lower: str, extractor: Dict
+    ) -> Optional[ExtractionResult]:
+        """
+        Extract a field with its confidence, reusing the extraction match as the source.
+
+        aare-core searches the pattern again to find the source text, which
+        would run `re` even where extraction used RE2. The IGNORECASE match on
+        lowercased ASCII text spans the same characters as the match on the
+        original text, so the source is sliced from it instead.
+        """
+        if (
+            extractor.get("_compiled") is None
+            or extractor.get("type") not in PATTERN_TYPES
+            or not getattr(self._local, "ascii", False)
+            or _CASE_SENSITIVE_FLAG.search(extractor["pattern"])
+        ):
+            return super()._extract_field_with_confidence(text, text_lower, extractor)
+
+        match = self._search(text_lower, extractor)
+        value = self._match_value(match, text, extractor["type"])
+        if value is None:
+            return None
+
+        return ExtractionResult(
+            value=value,
+            confidence=self._calculate_confidence(text, text_lower, extractor, value),
+            source=text[match.start():match.end()],
+            extractor_type=extractor["type"]
+        )
+
+    def _extract_field(
+        self, text: str, text_lower: str, extractor: Dict[str, Any]
+    ) -> Optional[Any]:
+        """Extract a single field from pre-compiled regexes or keyword scan results"""
+        if extractor.get("_keyword_indexed"):
+            hits = getattr(self._local, "keyword_hits", None)
+            if hits is not None:
+                return id(extractor) in hits
+
+        if extractor.get("_compiled") is None or extractor.get("type") not in PATTERN_TYPES:
+            return super()._extract_field(text, text_lower, extractor)
+
+        return self._match_value(self._search(text_lower, extractor), text, extractor["type"])
+
+    def _search(self, text_lower: str, extractor: Dict[str, Any]):
+        """Search with the extractor's RE2 regex when the text allows it, else its `re` one"""
+        compiled_re2 = extractor.get("_compiled_re2")
+        if compiled_re2 is not None and getattr(self._local, "use_re2", False):
+            return compiled_re2.search(text_lower)
+        return extractor["_compiled"].search(text_lower)
+
+    def _match_value(self, match, text: str, extractor_type: str) -> Optional[Any]:
+        """Convert a pattern match into the extracted value, as aare-core does"""
+        if match is None:
+            return None
+
+        if extractor_type == "string":
+            return match.group(1) if match.groups() else match.group(0)
+
+        if match.groups():
+            return self._parse_numeric(match, text, extractor_type)
+        return None
@@ -0,0 +1,306 @@
+"""
+Ontology loader for aare.ai (Azure Functions)
+Extends the aare-core loader with Azure Blob Storage and a per-instance cache
+"""
+import io
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import ahocorasick
+import orjson
+import requests
+from azure.core import MatchConditions
+from azure.core.exceptions import AzureError, ResourceNotFoundError, ResourceNotModifiedError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from aare_core import LLMParser, OntologyLoader as CoreOntologyLoader
+
+try:
+    import re2
+except ImportError:  # google-re2 is optional
+    re2 = None
+
+logger = logging.getLogger(__name__)
+
+# Parallel range GETs for ontologies larger than a single GET
+BLOB_DOWNLOAD_CONCURRENCY = 4
+
+# Keep-alive connections kept open to Azure Storage
+BLOB_CONNECTION_POOL_SIZE = 32
+
+# Blob listing the container's ontologies, as {"ontologies": ["name", ...]}
+MANIFEST_BLOB = "manifest.json"
+
+# Names that fell back to another ontology, remembered so unknown names
+# do not repeat the blob and filesystem lookups on every request
+MISS_CACHE_SIZE = 256
+MISS_CACHE_TTL_S = 60.0
+
+_parser = LLMParser()
+
+if re2 is not None:
+    # Same case-insensitive matching aare-core compiles `re` patterns with
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.case_sensitive = False
+    _RE2_OPTIONS.log_errors = False
+
+# Process-wide blob client shared by all loaders, built by _get_blob_client
+_BLOB_CLIENT: Optional[BlobServiceClient] = None
+_BLOB_CLIENT_LOCK = threading.Lock()
+
+
+def _get_blob_client() -> Optional[BlobServiceClient]:
+    """Return the shared BlobServiceClient, or None if blob storage is not configured"""
+    global _BLOB_CLIENT
+    if _BLOB_CLIENT is not None:
+        return _BLOB_CLIENT
+
+    conn_str = os.environ.get("AZURE_STORAGE_CONNECTION_STRING")
+    if not conn_str:
+        return None
+
+    with _BLOB_CLIENT_LOCK:
+        if _BLOB_CLIENT is None:
+            # azure-core only sizes its own session's pool, so supply one;
+            # retries stay with the azure-core pipeline, as in its default adapter
+            adapter = HTTPAdapter(
+                pool_maxsize=BLOB_CONNECTION_POOL_SIZE,
+                max_retries=Retry(total=False, redirect=False, raise_on_status=False)
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            try:
+                _BLOB_CLIENT = BlobServiceClient.from_connection_string(
+                    conn_str, transport=RequestsTransport(session=session, session_owner=False)
+                )
+            except ValueError as e:
+                logger.warning("Blob storage disabled, invalid connection string: %s", e)
+                return None
+    return _BLOB_CLIENT
+
+
+# Constructs where RE2 and `re` disagree even on ASCII text: `re`'s `$` also
+# matches before a trailing newline, `\B` differs on empty text, a repeated
+# group can keep a different last capture, `re` reads `{,n}` as `{0,n}` where
+# RE2 reads it as literal text, and `[[:digit:]]` is a nested set to `re` but
+# a POSIX class to RE2
+_RE2_UNSAFE_PATTERN = re.compile(r"(?<!\\)(?:\\\\)*(?:\$|\\B)|\)[*+{]|\{,|\[[^\]]*\[:")
+
+
+def _compile_re2(pattern: str):
+    """
+    Compile an extractor pattern with RE2, or return None if it cannot be used.
+
+    RE2 matches in linear time, so a long llm_output cannot trigger
+    catastrophic backtracking. Its \\d, \\s, \\w and \\b are ASCII-only, so
+    only ASCII patterns are compiled and the parser uses them on ASCII text
+    only. Patterns with constructs RE2 treats differently, or cannot express
+    (lookarounds, backreferences), keep `re`.
+    """
+    if re2 is None or not pattern.isascii() or _RE2_UNSAFE_PATTERN.search(pattern):
+        return None
+    try:
+        return re2.compile(pattern, _RE2_OPTIONS)
+    except re2.error:
+        return None
+
+
+def _compile_extractors(ontology: Dict) -> None:
+    """
+    Pre-compile the ontology's extractors.
+
+    Pattern extractors get their regex attached as `_compiled`, plus an RE2
+    version as `_compiled_re2` when google-re2 is installed. Keyword-only
+    boolean extractors are marked `_keyword_indexed` and their keywords are
+    merged into one Aho-Corasick automaton stored as `_keyword_automaton`,
+    so the parser scans the text once instead of once per keyword.
+    """
+    keyword_extractors: Dict[str, List[Dict]] = {}
+
+    for extractor in ontology.get("extractors", {}).values():
+        pattern = extractor.get("pattern")
+        if pattern:
+            # Same flags and invalid-pattern handling as aare-core's parser
+            compiled = _parser._get_compiled_pattern(pattern)
+            if compiled is not None:
+                extractor["_compiled"] = compiled
+                compiled_re2 = _compile_re2(pattern)
+                if compiled_re2 is not None:
+                    extractor["_compiled_re2"] = compiled_re2
+        elif extractor.get("type") == "boolean":
+            keywords = extractor.get("keywords", [])
+            # An empty keyword matches everywhere, which the automaton cannot express;
+            # aare-core matches keywords as given but counts confidence on
+            # lowercased ones, which agree only for lowercase keywords
+            if keywords and all(isinstance(kw, str) and kw and kw == kw.lower() for kw in keywords):
+                extractor["_keyword_indexed"] = True
+                for kw in keywords:
+                    keyword_extractors.setdefault(kw, []).append(extractor)
+
+    if keyword_extractors:
+        automaton = ahocorasick.Automaton()
+        for kw, extractors in keyword_extractors.items():
+            automaton.add_word(kw, (kw, extractors))
+        automaton.make_automaton()
+        ontology["_keyword_automaton"] = automaton
+
+
+# aare-core's example ontology, built once at import instead of on every fallback
+_DEFAULT_ONTOLOGY = CoreOntologyLoader()._get_example_ontology()
+_compile_extractors(_DEFAULT_ONTOLOGY)
+
+
+class OntologyLoader(CoreOntologyLoader):
+    """
+    Loads ontologies and caches them by name on the instance.
+
+    When AZURE_STORAGE_CONNECTION_STRING is set, ontologies are read from the
+    ONTOLOGY_CONTAINER blob container first; missing blobs fall back to the
+    aare-core filesystem lookup. `list_available` adds the names listed in
+    the container's MANIFEST_BLOB, re-downloaded only when its ETag changes.
+
+    aare-core wraps `load` in `lru_cache`, which hashes `self` on every call
+    and keeps every loader alive for the life of the process. A dict on the
+    instance is cheaper and goes away with the loader. Names that fall back
+    to another ontology are kept in a small LRU for MISS_CACHE_TTL_S, so a
+    blob uploaded later is still picked up.
+    """
+
+    def __init__(self, ontology_dir=None, compile_constraints: Optional[Callable[[Dict], Any]] = None):
+        super().__init__(ontology_dir)
+        self._cache: Dict[str, Dict] = {}
+        # name -> (monotonic time of the lookup, fallback ontology returned)
+        self._misses: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._misses_lock = threading.Lock()
+        # Optional hook run on each validated ontology, e.g. SMTVerifier.compile_constraints
+        self._compile_constraints = compile_constraints
+        self._container = None
+        # (etag, names) of the last manifest download
+        self._manifest: Tuple[Optional[str], List[str]] = (None, [])
+
+        client = _get_blob_client()
+        if client is not None:
+            self._container = client.get_container_client(
+                os.environ.get("ONTOLOGY_CONTAINER", "ontologies")
+            )
+
+    def load(self, ontology_name):
+        """Load ontology, returning the cached copy after the first call"""
+        hit = self._cache.get(ontology_name)
+        if hit is not None:
+            return hit
+
+        now = time.monotonic()
+        with self._misses_lock:
+            miss = self._misses.get(ontology_name)
+            if miss is not None and now - miss[0] < MISS_CACHE_TTL_S:
+                self._misses.move_to_end(ontology_name)
+                return miss[1]
+
+        ontology = self._load_from_blob(ontology_name)
+        if ontology is None:
+            # Call the undecorated aare-core implementation to bypass its lru_cache
+            ontology = CoreOntologyLoader.load.__wrapped__(self, ontology_name)
+
+        # Names come from request bodies, so only real ontologies are cached
+        # for good; fallbacks go to the bounded, expiring miss cache
+        if ontology.get("name") == ontology_name:
+            self._cache[ontology_name] = ontology
+        else:
+            with self._misses_lock:
+                self._misses[ontology_name] = (now, ontology)
+                self._misses.move_to_end(ontology_name)
+                if len(self._misses) > MISS_CACHE_SIZE:
+                    self._misses.popitem(last=False)
+        return ontology
+
+    def list_available(self):
+        """List all available ontologies, including those in the blob manifest"""
+        ontologies = super().list_available()
+        manifest_names = self._manifest_names()
+        if not manifest_names:
+            return ontologies
+        return sorted(set(ontologies).union(manifest_names))
+
+    def _manifest_names(self) -> List[str]:
+        """
+        Return the ontology names listed in the manifest blob.
+
+        After the first download, requests are conditional on the cached
+        ETag, so an unchanged manifest costs one 304 response. On errors the
+        last names read are kept.
+        """
+        if self._container is None:
+            return []
+
+        etag, names = self._manifest
+        try:
+            if etag is None:
+                downloader = self._container.download_blob(MANIFEST_BLOB)
+            else:
+                downloader = self._container.download_blob(
+                    MANIFEST_BLOB, etag=etag, match_condition=MatchConditions.IfModified
+                )
+            manifest = orjson.loads(downloader.readall())
+            if not isinstance(manifest, dict) or not isinstance(manifest.get("ontologies"), list):
+                raise ValueError("expected an object with an 'ontologies' list")
+            names = [name for name in manifest["ontologies"] if isinstance(name, str)]
+            self._manifest = (downloader.properties.etag, names)
+        except ResourceNotModifiedError:
+            pass
+        except ResourceNotFoundError:
+            self._manifest = (None, [])
+            return []
+        except orjson.JSONDecodeError as e:
+            logger.warning("Failed to parse ontology manifest: Invalid JSON: %s", e)
+        except ValueError as e:
+            logger.warning("Invalid ontology manifest: %s", e)
+        except AzureError as e:
+            logger.warning("Failed to download ontology manifest: %s", e)
+        return names
+
+    def _load_from_blob(self, ontology_name):
+        """Load and validate an ontology from blob storage, or return None"""
+        if self._container is None:
+            return None
+
+        try:
+            downloader = self._container.download_blob(
+                f"{ontology_name}.json", max_concurrency=BLOB_DOWNLOAD_CONCURRENCY
+            )
+            # Stream straight into one buffer and parse it in place, without
+            # the extra bytes copy readall() makes
+            buffer = io.BytesIO()
+            downloader.readinto(buffer)
+            ontology = orjson.loads(buffer.getbuffer())
+            return self._validate_ontology(ontology)
+        except ResourceNotFoundError:
+            return None
+        except orjson.JSONDecodeError as e:
+            logger.warning("Failed to parse ontology blob %s: Invalid JSON: %s", ontology_name, e)
+        except ValueError as e:
+            logger.warning("Invalid ontology blob %s: %s", ontology_name, e)
+        except AzureError as e:
+            logger.warning("Failed to download ontology blob %s: %s", ontology_name, e)
+        return None
+
+    def _validate_ontology(self, ontology):
+        """Validate ontology structure and pre-compile its extractors and constraints"""
+        ontology = super()._validate_ontology(ontology)
+        _compile_extractors(ontology)
+        if self._compile_constraints is not None:
+            self._compile_constraints(ontology)
+        return ontology
+
+    def _get_example_ontology(self):
+        """Return the shared default ontology"""
+        return _DEFAULT_ONTOLOGY
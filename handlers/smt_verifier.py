@@ -0,0 +1,712 @@
+"""
+SMT verifier for aare.ai (Azure Functions)
+Extends the aare-core verifier with pooled, per-ontology Z3 solvers
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from z3 import (
+    Bool, BoolSort, Const, Context, Implies, Model, Not, Solver, sat, unknown, unsat, substitute,
+    Z3Exception, Z3_OP_DIV, Z3_OP_IDIV, Z3_OP_MOD, Z3_OP_REM, is_app, is_bool, is_false,
+    is_int, is_int_value, is_rational_value, is_real, is_true
+)
+
+from aare_core import SMTVerifier as CoreSMTVerifier
+from aare_core.smt_verifier import SMT_SOLVER_TIMEOUT_MS
+
+logger = logging.getLogger(__name__)
+
+# Solvers per ontology; each lives in its own Z3 context so checks can overlap
+POOL_SIZE = max(2, os.cpu_count() or 1)
+
+# Items checked per solver call in verify_batch
+BATCH_CHUNK_SIZE = 200
+
+# Verification results remembered for repeated identical inputs
+RESULT_CACHE_SIZE = 4096
+
+# Solving budget per request (per chunk in verify_batch), in milliseconds
+SMT_TIMEOUT_MS = int(os.environ.get("SMT_TIMEOUT_MS", SMT_SOLVER_TIMEOUT_MS))
+
+# reason_unknown() values for checks stopped by a timeout or interrupt
+_TIMEOUT_REASONS = {"timeout", "canceled", "interrupted"}
+
+# Formulas are compiled in Z3's shared main context, which is not thread-safe
+_MAIN_CTX_LOCK = threading.Lock()
+
+# Operators Z3 leaves unspecified when the divisor is zero
+_PARTIAL_OPS = {Z3_OP_DIV, Z3_OP_IDIV, Z3_OP_MOD, Z3_OP_REM}
+
+
+class SolverTimeout(Exception):
+    """Raised when a check runs out of time instead of reaching a result"""
+
+
+@contextmanager
+def _watchdog(cached: "CachedSolver", timeout_ms: int) -> Iterator[None]:
+    """
+    Interrupt Z3 work on a checked-out solver once `timeout_ms` has passed.
+
+    Context.interrupt is safe to call from another thread. The lock keeps a
+    late timer from interrupting the context after it went back to the pool.
+    An interrupt leaves the context canceled until its next check, so any
+    Z3 call in between (push, model, eval) fails. If the timer fired, the
+    solver's scopes are popped, one check clears the canceled state, and
+    the block ends with SolverTimeout, since its results may be incomplete.
+    """
+    lock = threading.Lock()
+    active = True
+    fired = False
+
+    def interrupt():
+        nonlocal fired
+        with lock:
+            if active:
+                fired = True
+                cached.ctx.interrupt()
+
+    timer = threading.Timer(timeout_ms / 1000, interrupt)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except Z3Exception as e:
+        if not fired:
+            raise
+        raise SolverTimeout(str(e)) from e
+    finally:
+        with lock:
+            active = False
+        timer.cancel()
+        if fired:
+            solver = cached.solver
+            solver.pop(solver.num_scopes())
+            solver.check()
+    if fired:
+        raise SolverTimeout("interrupted")
+
+
+def _decided_by_data(formula) -> bool:
+    """
+    Return whether binding every variable decides the formula's truth value.
+
+    Z3 treats `x / 0` as an unspecified value rather than an error, so a
+    formula that divides by a non-constant (a missing denominator defaults
+    to 0) can be both true and false for the same data.
+    """
+    stack = [formula]
+    seen = set()
+    while stack:
+        expr = stack.pop()
+        if not is_app(expr) or expr.get_id() in seen:
+            continue
+        seen.add(expr.get_id())
+        if expr.decl().kind() in _PARTIAL_OPS:
+            divisor = expr.arg(1)
+            if not (is_int_value(divisor) or is_rational_value(divisor)) or divisor.as_string() == "0":
+                return False
+        stack.extend(expr.children())
+    return True
+
+
+@dataclass
+class CompiledConstraint:
+    """A constraint with its Z3 variables and compiled formula"""
+    constraint: Dict
+    z3_vars: Dict = field(default_factory=dict)
+    formula: Any = None
+    error: Optional[Exception] = None
+    tracker: Any = None
+    # False if the data may not decide the formula; such constraints are
+    # always checked on their own, as aare-core does
+    decided: bool = True
+
+
+@dataclass
+class BatchItem:
+    """One verify_batch item with its assignments and formulas over renamed variables"""
+    data: Dict
+    assignments: List[Any] = field(default_factory=list)
+    results: List[Optional[Dict[str, Any]]] = field(default_factory=list)
+    pending: List[Tuple[int, Any, Dict]] = field(default_factory=list)
+    # Indexes of constraints not decided by the data, checked with _check_single
+    single: List[int] = field(default_factory=list)
+
+
+@dataclass
+class CachedSolver:
+    """A Z3 solver and its compiled constraints, owned by one context"""
+    ctx: Context
+    solver: Solver
+    constraints: List[CompiledConstraint]
+
+
+class SolverPool:
+    """
+    Pool of solvers for one ontology version.
+
+    Solvers are built lazily up to `size`; beyond that, callers wait for a
+    solver to be released.
+    """
+
+    def __init__(self, build: Callable[[], CachedSolver], size: int = POOL_SIZE):
+        self._build = build
+        self._size = size
+        self._idle: "queue.Queue[CachedSolver]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def solver(self) -> Iterator[CachedSolver]:
+        """Check out a solver for the duration of the block"""
+        cached = self._acquire()
+        try:
+            yield cached
+        finally:
+            self._idle.put(cached)
+
+    def fill(self) -> None:
+        """Build solvers until the pool is at full size"""
+        while True:
+            with self._lock:
+                if self._created >= self._size:
+                    return
+                self._created += 1
+            self._idle.put(self._build_counted())
+
+    def _acquire(self) -> CachedSolver:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            grow = self._created < self._size
+            if grow:
+                self._created += 1
+        if grow:
+            return self._build_counted()
+        return self._idle.get()
+
+    def _build_counted(self) -> CachedSolver:
+        try:
+            return self._build()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+
+class SMTVerifier(CoreSMTVerifier):
+    """
+    Verifies data against ontology constraints using pooled Z3 solvers.
+
+    Formulas are compiled once per (name, version) of the ontology and
+    translated into a pool of solvers, each in its own Z3 context, where
+    they are asserted behind tracking literals. Each request checks out
+    one solver, pushes its data assignments, finds violations from unsat
+    cores, and pops again, so concurrent requests never share a context.
+    Constraints the data may not decide (division by a variable) are
+    checked one at a time instead, as aare-core checks every constraint.
+    A request that runs past SMT_TIMEOUT_MS is interrupted and answered
+    with proof "timeout".
+
+    The last RESULT_CACHE_SIZE results are kept in an LRU keyed by ontology
+    and data, so a repeated input is answered without calling Z3.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._solver_cache: Dict[Tuple[str, str], SolverPool] = {}
+        self._cache_lock = threading.Lock()
+        self._result_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+
+    def verify(self, data: Dict, ontology: Dict) -> Dict[str, Any]:
+        """Verify data against ontology constraints using Z3"""
+        key = self._result_key(data, ontology)
+        if key is not None:
+            with self._result_cache_lock:
+                hit = self._result_cache.get(key)
+                if hit is not None:
+                    self._result_cache.move_to_end(key)
+            if hit is not None:
+                # The proof certificate is issued for this request, not the cached one
+                return {**hit, "proof": {**hit["proof"], "timestamp": time.time()}, "execution_time_ms": 0}
+
+        start_time = time.time()
+
+        try:
+            with self._get_pool(ontology).solver() as cached, _watchdog(cached, SMT_TIMEOUT_MS):
+                results = self._check_tracked(cached, data)
+                if results is None:
+                    # Tracked check was inconclusive; fall back to one check per constraint
+                    results = [self._check_single(cached.solver, data, c) for c in cached.constraints]
+        except SolverTimeout:
+            logger.warning("Verification against %s timed out after %d ms", ontology["name"], SMT_TIMEOUT_MS)
+            return self._timeout_response(start_time)
+
+        response = self._build_response(results, start_time)
+        if key is not None:
+            with self._result_cache_lock:
+                self._result_cache[key] = response
+                if len(self._result_cache) > RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+        return response
+
+    def _result_key(self, data: Dict, ontology: Dict) -> Optional[Tuple]:
+        """
+        Return the result cache key for a request, or None if data is unhashable.
+
+        Value types are part of the key because True == 1 == 1.0 as dict
+        keys, while Z3 treats them differently.
+        """
+        try:
+            key = (
+                ontology["name"],
+                ontology["version"],
+                tuple(sorted((name, type(value), value) for name, value in data.items()))
+            )
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def verify_batch(self, items: List[Dict], ontology: Dict) -> List[Dict[str, Any]]:
+        """
+        Verify many data dicts against one ontology.
+
+        Items are checked BATCH_CHUNK_SIZE at a time with one solver call per
+        chunk, each with its own renamed copy of the variables. Each item's
+        execution_time_ms is the time taken by its chunk, and every item of a
+        chunk that runs out of time gets a timeout response.
+        """
+        responses = []
+        pool = self._get_pool(ontology)
+        for offset in range(0, len(items), BATCH_CHUNK_SIZE):
+            chunk = items[offset:offset + BATCH_CHUNK_SIZE]
+            start_time = time.time()
+
+            try:
+                with pool.solver() as cached, _watchdog(cached, SMT_TIMEOUT_MS):
+                    chunk_results = self._check_chunk(cached, chunk)
+            except SolverTimeout:
+                logger.warning("Batch verification against %s timed out after %d ms", ontology["name"], SMT_TIMEOUT_MS)
+                responses.extend(self._timeout_response(start_time) for _ in chunk)
+                continue
+
+            responses.extend(self._build_response(results, start_time) for results in chunk_results)
+        return responses
+
+    def _check_chunk(self, cached: CachedSolver, items: List[Dict]) -> List[List[Dict[str, Any]]]:
+        """Check a chunk of items, building each item's renamed formulas once"""
+        sorts = [
+            None if compiled.error is not None
+            else {name: var.sort() for name, var in compiled.z3_vars.items()}
+            for compiled in cached.constraints
+        ]
+        batch = [self._prepare_batch_item(cached, sorts, i, data) for i, data in enumerate(items)]
+        return self._check_bisect(cached, batch)
+
+    def _check_bisect(self, cached: CachedSolver, batch: List[BatchItem]) -> List[List[Dict[str, Any]]]:
+        """
+        Check prepared items together, bisecting to isolate inconclusive ones.
+
+        One item with contradictory assignments makes the whole batch check
+        inconclusive, so the batch is halved until such items are checked
+        on their own through the single-item path.
+        """
+        results = self._check_batch(cached, batch)
+        if results is not None:
+            return results
+
+        if len(batch) == 1:
+            data = batch[0].data
+            results = self._check_tracked(cached, data)
+            if results is None:
+                results = [self._check_single(cached.solver, data, c) for c in cached.constraints]
+            return [results]
+
+        middle = len(batch) // 2
+        return self._check_bisect(cached, batch[:middle]) + self._check_bisect(cached, batch[middle:])
+
+    def _build_response(self, results: List[Dict[str, Any]], start_time: float) -> Dict[str, Any]:
+        """Collect per-constraint results into a verification response"""
+        violations = []
+        proofs = []
+        all_missing_vars = set()
+
+        for result in results:
+            if result.get("error") is not None:
+                violations.append(result["error"])
+                continue
+            if result["violated"]:
+                violations.append(result["violation"])
+                proofs.append(result["proof"])
+            all_missing_vars.update(result.get("missing_vars", []))
+
+        execution_time = int((time.time() - start_time) * 1000)
+
+        response = {
+            "verified": len(violations) == 0,
+            "violations": violations,
+            "proof": self._generate_proof_certificate(proofs),
+            "execution_time_ms": execution_time
+        }
+
+        if all_missing_vars:
+            response["warnings"] = [f"Variables defaulted (not found in input): {sorted(all_missing_vars)}"]
+
+        return response
+
+    def _timeout_response(self, start_time: float) -> Dict[str, Any]:
+        """Build the response for a verification that ran out of time"""
+        return {
+            "verified": False,
+            "violations": [],
+            "proof": "timeout",
+            "execution_time_ms": int((time.time() - start_time) * 1000)
+        }
+
+    def prewarm(self, ontology: Dict) -> None:
+        """Fill the solver pool for an ontology and trigger Z3's lazy init"""
+        pool = self._get_pool(ontology)
+        pool.fill()
+        with pool.solver() as cached:
+            cached.solver.check()
+
+    def _get_pool(self, ontology: Dict) -> SolverPool:
+        """Return the solver pool for an ontology, compiling it on first use"""
+        key = (ontology["name"], ontology["version"])
+        pool = self._solver_cache.get(key)
+        if pool is None:
+            with self._cache_lock:
+                pool = self._solver_cache.get(key)
+                if pool is None:
+                    template = self.compile_constraints(ontology)
+                    pool = SolverPool(lambda: self._build_solver(template))
+                    self._solver_cache[key] = pool
+        return pool
+
+    def compile_constraints(self, ontology: Dict) -> List[CompiledConstraint]:
+        """
+        Declare variables and compile every constraint formula once.
+
+        The result is stored on the ontology as `_compiled_constraints`, so
+        an ontology compiled at load time is never compiled again.
+        """
+        compiled_constraints = ontology.get("_compiled_constraints")
+        if compiled_constraints is not None:
+            return compiled_constraints
+
+        constraints = []
+        with _MAIN_CTX_LOCK:
+            for constraint in ontology["constraints"]:
+                compiled = CompiledConstraint(constraint=constraint)
+                try:
+                    if "formula" not in constraint:
+                        raise ValueError(f"Constraint {constraint['id']} missing 'formula' field. All constraints must have structured formulas.")
+                    compiled.z3_vars = self._create_z3_variables(constraint["variables"], {})
+                    formula = self.compiler.compile(constraint["formula"], compiled.z3_vars)
+                    # A constant formula compiles to a Python bool; like aare-core's Not(),
+                    # wrap it as a Z3 Bool and reject expressions that are not Boolean
+                    compiled.formula = BoolSort().cast(formula)
+                    compiled.decided = _decided_by_data(compiled.formula)
+                except Exception as e:
+                    # Reported as a violation on every request, like aare-core does
+                    compiled.error = e
+                constraints.append(compiled)
+
+        ontology["_compiled_constraints"] = constraints
+        return constraints
+
+    def _build_solver(self, template: List[CompiledConstraint]) -> CachedSolver:
+        """Translate compiled constraints into a fresh context with its own solver"""
+        ctx = Context()
+        solver = Solver(ctx=ctx)
+        solver.set("timeout", SMT_TIMEOUT_MS)
+
+        constraints = []
+        with _MAIN_CTX_LOCK:
+            for i, compiled in enumerate(template):
+                if compiled.error is not None:
+                    constraints.append(compiled)
+                    continue
+                constraints.append(CompiledConstraint(
+                    constraint=compiled.constraint,
+                    z3_vars={name: var.translate(ctx) for name, var in compiled.z3_vars.items()},
+                    formula=compiled.formula.translate(ctx),
+                    tracker=Bool(f"__track_{i}", ctx),
+                    decided=compiled.decided
+                ))
+
+        # Each formula is asserted once, guarded by its tracking literal;
+        # requests enable constraints by passing trackers as assumptions
+        for compiled in constraints:
+            if compiled.tracker is not None:
+                solver.add(Implies(compiled.tracker, compiled.formula))
+
+        return CachedSolver(ctx=ctx, solver=solver, constraints=constraints)
+
+    def _check_tracked(self, cached: CachedSolver, data: Dict) -> Optional[List[Dict[str, Any]]]:
+        """
+        Check all constraints against one set of data assignments.
+
+        Assignments are pushed once and every constraint is assumed via its
+        tracking literal. Constraints the data may not decide are checked
+        on their own afterwards. Returns None if the check is inconclusive
+        (timeout or contradictory assignments).
+        """
+        solver = cached.solver
+        results: List[Optional[Dict[str, Any]]] = []
+        trackers: Dict[str, Tuple[Any, int]] = {}
+        single = []
+
+        solver.push()
+        try:
+            for index, compiled in enumerate(cached.constraints):
+                if compiled.error is None and not compiled.decided:
+                    single.append(index)
+                    results.append(None)
+                    continue
+                try:
+                    if compiled.error is not None:
+                        raise compiled.error
+                    assignments, missing_vars = self._assignments(compiled, data)
+                except Exception as e:
+                    results.append({"error": self._error_violation(compiled.constraint, e)})
+                    continue
+                solver.add(*assignments)
+                trackers[str(compiled.tracker)] = (compiled.tracker, index)
+                results.append({"violated": False, "missing_vars": missing_vars})
+
+            violated = self._find_violated(solver, trackers)
+            if violated is None:
+                return None
+            model = solver.model()
+        finally:
+            solver.pop()
+
+        for index in violated:
+            results[index] = self._violation_result(
+                cached.constraints[index], model, results[index]["missing_vars"]
+            )
+        for index in single:
+            results[index] = self._check_single(solver, data, cached.constraints[index])
+        return results
+
+    def _prepare_batch_item(
+        self, cached: CachedSolver, sorts: List[Optional[Dict[str, Any]]], item_index: int, data: Dict
+    ) -> BatchItem:
+        """Build one item's assignments and formulas over renamed copies of the variables"""
+        item = BatchItem(data=data)
+        renamed: Dict[Tuple[str, Any], Any] = {}
+        for index, compiled in enumerate(cached.constraints):
+            if compiled.error is None and not compiled.decided:
+                item.single.append(index)
+                item.results.append(None)
+                continue
+            try:
+                if compiled.error is not None:
+                    raise compiled.error
+                z3_vars = {}
+                for name, sort in sorts[index].items():
+                    # Constraints may declare one name with different sorts
+                    key = (name, sort)
+                    if key not in renamed:
+                        renamed[key] = Const(f"{name}__{item_index}", sort)
+                    z3_vars[name] = renamed[key]
+                assignments, missing_vars = self._assignments(compiled, data, z3_vars)
+                formula = substitute(
+                    compiled.formula,
+                    *[(var, z3_vars[name]) for name, var in compiled.z3_vars.items()]
+                )
+            except Exception as e:
+                item.results.append({"error": self._error_violation(compiled.constraint, e)})
+                continue
+            item.assignments.extend(assignments)
+            item.pending.append((index, formula, z3_vars))
+            item.results.append({"violated": False, "missing_vars": missing_vars})
+        return item
+
+    def _check_batch(self, cached: CachedSolver, batch: List[BatchItem]) -> Optional[List[List[Dict[str, Any]]]]:
+        """
+        Check several prepared items with a single solver call.
+
+        All assignments are pushed together and checked once; since every
+        variable is bound, each item's formulas are then decided by
+        evaluating them in that one model. Constraints the data may not
+        decide are checked per item afterwards. Returns None if the check or
+        an evaluation is inconclusive.
+        """
+        solver = cached.solver
+        solver.push()
+        try:
+            for item in batch:
+                solver.add(*item.assignments)
+            if self._check(solver) != sat:
+                return None
+            model = solver.model()
+        finally:
+            solver.pop()
+
+        results: List[List[Dict[str, Any]]] = []
+        for item in batch:
+            item_results = list(item.results)
+            for index, formula, z3_vars in item.pending:
+                value = model.eval(formula, model_completion=True)
+                if is_true(value):
+                    continue
+                if not is_false(value):
+                    return None
+                item_results[index] = self._violation_result(
+                    cached.constraints[index], model, item_results[index]["missing_vars"], z3_vars
+                )
+            results.append(item_results)
+
+        for item, item_results in zip(batch, results):
+            for index in item.single:
+                item_results[index] = self._check_single(solver, item.data, cached.constraints[index])
+        return results
+
+    def _find_violated(self, solver: Solver, trackers: Dict[str, Tuple[Any, Any]]) -> Optional[List[Any]]:
+        """
+        Return the keys of tracked constraints that are violated.
+
+        Each unsat core names violated constraints, which are dropped before
+        re-checking, so the solver runs once per violation plus once more and
+        is left with a model of the remaining constraints. Returns None if a
+        check is inconclusive.
+        """
+        active = dict(trackers)
+        violated = []
+        while True:
+            result = self._check(solver, *[tracker for tracker, _ in active.values()])
+            if result == sat:
+                return violated
+            if result != unsat:
+                return None
+
+            core = [str(literal) for literal in solver.unsat_core()]
+            if len(core) > 1:
+                # Cores need not be minimal; keep literals that fail on their own
+                core = [name for name in core if self._check(solver, active[name][0]) == unsat]
+            if not core:
+                return None
+            for name in core:
+                violated.append(active.pop(name)[1])
+            if not active:
+                # Leave the solver with a model of the data assignments
+                return violated if self._check(solver) == sat else None
+
+    def _check(self, solver: Solver, *assumptions) -> Any:
+        """Run a check, raising SolverTimeout if it stopped for lack of time"""
+        result = solver.check(*assumptions)
+        if result == unknown and solver.reason_unknown() in _TIMEOUT_REASONS:
+            raise SolverTimeout(solver.reason_unknown())
+        return result
+
+    def _check_single(self, solver: Solver, data: Dict, compiled: CompiledConstraint) -> Dict[str, Any]:
+        """Check a single pre-compiled constraint inside its own push/pop scope"""
+        try:
+            if compiled.error is not None:
+                raise compiled.error
+            assignments, missing_vars = self._assignments(compiled, data)
+        except Exception as e:
+            return {"error": self._error_violation(compiled.constraint, e)}
+
+        solver.push()
+        try:
+            solver.add(*assignments)
+            # Check if constraint can be violated
+            solver.add(Not(compiled.formula))
+
+            if self._check(solver) != sat:
+                return {"violated": False, "missing_vars": missing_vars}
+
+            model = solver.model()
+            return self._violation_result(compiled, model, missing_vars)
+        finally:
+            solver.pop()
+
+    def _assignments(
+        self, compiled: CompiledConstraint, data: Dict, z3_vars: Optional[Dict] = None
+    ) -> Tuple[List[Any], List[str]]:
+        """Build equalities binding a constraint's (or renamed) variables to the input data"""
+        assignments = []
+        missing_vars = []
+
+        # Add known values; default unknown values to non-triggering ones
+        for var_name, z3_var in (z3_vars or compiled.z3_vars).items():
+            if var_name in data:
+                assignments.append(z3_var == data[var_name])
+            else:
+                missing_vars.append(var_name)
+                if is_bool(z3_var):
+                    assignments.append(z3_var == False)
+                elif is_int(z3_var):
+                    assignments.append(z3_var == 0)
+                elif is_real(z3_var):
+                    assignments.append(z3_var == 0.0)
+
+        return assignments, missing_vars
+
+    def _violation_result(
+        self, compiled: CompiledConstraint, model, missing_vars: List[str],
+        z3_vars: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Build the result for a violated constraint from a witnessing model"""
+        constraint = compiled.constraint
+        z3_vars = z3_vars or compiled.z3_vars
+        return {
+            "violated": True,
+            "missing_vars": missing_vars,
+            "violation": {
+                "constraint_id": constraint["id"],
+                "category": constraint.get("category", "General"),
+                "description": constraint["description"],
+                "error_message": constraint.get("error_message", "Constraint violated"),
+                "formula": constraint.get("formula_readable", str(constraint.get("formula", ""))),
+                "model": self._model_to_dict(model, z3_vars),
+                "citation": constraint.get("citation", "")
+            },
+            "proof": {
+                "result": "SAT (violation found)",
+                "model": self._proof_model_text(model, compiled, z3_vars),
+                "constraint": constraint["id"]
+            }
+        }
+
+    def _proof_model_text(self, model, compiled: CompiledConstraint, z3_vars: Dict) -> str:
+        """
+        Format a constraint's variables in the model as the proof model text.
+
+        Pooled models also bind every other constraint's variables and
+        tracking literals (and, in batches, other items' renamed variables),
+        so only this constraint's values are copied, under their declared
+        names, into a model of their own and printed by Z3, in the same
+        format as aare-core's str(model).
+        """
+        proof_model = Model(model.ctx)
+        for name, var in compiled.z3_vars.items():
+            proof_model.update_value(var, model.eval(z3_vars[name], model_completion=True))
+        return str(proof_model)
+
+    def _error_violation(self, constraint: Dict, error: Exception) -> Dict[str, Any]:
+        """Build the violation entry reported when a constraint cannot be checked"""
+        constraint_id = constraint.get("id", "unknown")
+        logger.error("Error checking constraint %s: %s", constraint_id, error, exc_info=True)
+        return {
+            "constraint_id": constraint_id,
+            "category": constraint.get("category", "General"),
+            "description": constraint.get("description", ""),
+            "error_message": f"Verification error: {type(error).__name__}",
+            "error_details": str(error)
+        }
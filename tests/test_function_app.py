@@ -0,0 +1,235 @@
+"""
+Tests for the HTTP endpoints
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+import azure.functions as func
+import json
+import orjson
+
+# Add handlers to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import function_app
+
+PASSING_OUTPUT = "DTI: 35, FICO: 720. You are approved with $1,500 fees."
+FAILING_OUTPUT = "DTI: 50, FICO: 720. You are approved with $1,500 fees."
+# Extracts an eGFR that does not fit in 64 bits
+HUGE_EGFR_OUTPUT = "eGFR: 123456789012345678901234. Recommend metformin 500mg."
+
+
+def call(endpoint, body=None, method="POST", origin=None):
+    """Invoke an HTTP trigger with a request body (dict, or raw bytes)"""
+    if isinstance(body, (dict, list)):
+        body = orjson.dumps(body)
+    req = func.HttpRequest(
+        method=method,
+        url=f"/api/{endpoint.build().get_function_name()}",
+        headers={"Origin": origin} if origin else {},
+        body=body or b""
+    )
+    return asyncio.run(endpoint.build().get_user_function()(req))
+
+
+def json_body(response):
+    """Decode a JSON response body"""
+    return orjson.loads(response.get_body())
+
+
+class TestVerify:
+    """Test cases for the /verify endpoint"""
+
+    def test_verify_passing(self):
+        """Test a passing verification response"""
+        response = call(function_app.verify, {"llm_output": PASSING_OUTPUT})
+        body = json_body(response)
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/json"
+        assert body["verified"] == True
+        assert body["violations"] == []
+        assert body["ontology"]["name"] == function_app.DEFAULT_ONTOLOGY
+        assert body["parsed_data"]["dti"] == 35.0
+
+    def test_verify_violation(self):
+        """Test that violations are reported with a 200 response"""
+        body = json_body(call(function_app.verify, {"llm_output": FAILING_OUTPUT}))
+
+        assert body["verified"] == False
+        assert "ATR_QM_DTI" in [v["constraint_id"] for v in body["violations"]]
+
+    def test_verify_invalid_json(self):
+        """Test that a malformed body is rejected"""
+        response = call(function_app.verify, b"{not json")
+
+        assert response.status_code == 400
+        assert json_body(response) == {"error": "Invalid JSON in request body"}
+
+    @pytest.mark.parametrize("body", [b"[1, 2]", b'"text"', b"null"])
+    def test_verify_non_object_body(self, body):
+        """Test that JSON bodies other than objects are rejected"""
+        response = call(function_app.verify, body)
+
+        assert response.status_code == 400
+        assert json_body(response) == {"error": "Invalid JSON in request body"}
+
+    def test_verify_missing_llm_output(self):
+        """Test that llm_output is required"""
+        response = call(function_app.verify, {"ontology": "hipaa-v1"})
+
+        assert response.status_code == 400
+        assert json_body(response) == {"error": "llm_output is required"}
+
+    @pytest.mark.parametrize("body, error", [
+        ({"llm_output": 5}, "llm_output must be a string"),
+        ({"llm_output": ["x"]}, "llm_output must be a string"),
+        ({"llm_output": PASSING_OUTPUT, "ontology": ["a"]}, "ontology must be a string"),
+        ({"llm_output": PASSING_OUTPUT, "ontology": None}, "ontology must be a string"),
+    ])
+    def test_verify_invalid_field_types(self, body, error):
+        """Test that non-string llm_output and ontology are rejected"""
+        response = call(function_app.verify, body)
+
+        assert response.status_code == 400
+        assert json_body(response) == {"error": error}
+
+    def test_verify_int_beyond_64_bits(self):
+        """Test that extracted integers too large for orjson are still serialized"""
+        response = call(function_app.verify, {"llm_output": HUGE_EGFR_OUTPUT, "ontology": "medical-safety-v1"})
+
+        assert response.status_code == 200
+        assert response.headers["Access-Control-Allow-Origin"] == "https://aare.ai"
+        assert json.loads(response.get_body())["parsed_data"]["egfr"] == 123456789012345678901234
+
+    def test_cors_headers(self):
+        """Test that allowed origins are echoed and others get the primary domain"""
+        allowed = call(function_app.verify, {"llm_output": PASSING_OUTPUT}, origin="http://localhost:3000")
+        other = call(function_app.verify, {"llm_output": PASSING_OUTPUT}, origin="https://example.com")
+
+        assert allowed.headers["Access-Control-Allow-Origin"] == "http://localhost:3000"
+        assert other.headers["Access-Control-Allow-Origin"] == "https://aare.ai"
+        assert allowed.headers["Access-Control-Allow-Methods"] == "OPTIONS,POST"
+
+    def test_options_preflight(self):
+        """Test that preflight requests get CORS headers and an empty body"""
+        response = call(function_app.verify, method="OPTIONS", origin="https://www.aare.ai")
+
+        assert response.status_code == 200
+        assert response.get_body() == b""
+        assert response.headers["Access-Control-Allow-Origin"] == "https://www.aare.ai"
+
+
+class TestVerifyBatch:
+    """Test cases for the /verify_batch endpoint"""
+
+    def test_results_in_item_order(self, monkeypatch):
+        """Test that items are grouped per ontology and results keep item order"""
+        calls = []
+        verify_batch = function_app.smt_verifier.verify_batch
+
+        def recording_verify_batch(items, ontology):
+            calls.append((ontology["name"], len(items)))
+            return verify_batch(items, ontology)
+
+        monkeypatch.setattr(function_app.smt_verifier, "verify_batch", recording_verify_batch)
+        items = [
+            {"llm_output": PASSING_OUTPUT},
+            {"llm_output": "Patient name: Jane Doe", "ontology": "hipaa-v1"},
+            {"llm_output": FAILING_OUTPUT},
+            {"llm_output": "No identifiers are included.", "ontology": "hipaa-v1"},
+        ]
+
+        response = call(function_app.verify_batch, {"items": items})
+        results = json_body(response)["results"]
+
+        assert response.status_code == 200
+        assert sorted(calls) == [("hipaa-v1", 2), ("mortgage-compliance-v1", 2)]
+        assert [r["ontology"]["name"] for r in results] == [
+            "mortgage-compliance-v1", "hipaa-v1", "mortgage-compliance-v1", "hipaa-v1"
+        ]
+        for item, result in zip(items, results):
+            single = json_body(call(function_app.verify, item))
+            assert result["verified"] == single["verified"]
+            assert result["violations"] == single["violations"]
+        assert len({r["verification_id"] for r in results}) == len(results)
+
+    def test_per_item_errors(self):
+        """Test that invalid items get error entries while the rest are verified"""
+        items = [
+            {"llm_output": PASSING_OUTPUT},
+            {"llm_output": 5},
+            {"llm_output": ""},
+            "not an object",
+            {"llm_output": PASSING_OUTPUT, "ontology": ["a"]},
+            {"llm_output": FAILING_OUTPUT},
+        ]
+
+        response = call(function_app.verify_batch, {"items": items})
+        results = json_body(response)["results"]
+
+        assert response.status_code == 200
+        assert results[1:5] == [
+            {"error": "llm_output must be a string"},
+            {"error": "llm_output is required"},
+            {"error": "llm_output is required"},
+            {"error": "ontology must be a string"},
+        ]
+        assert results[0]["verified"] == True
+        assert results[5]["verified"] == False
+
+    def test_int_beyond_64_bits(self):
+        """Test that an oversized extracted integer does not fail the other items"""
+        items = [
+            {"llm_output": HUGE_EGFR_OUTPUT, "ontology": "medical-safety-v1"},
+            {"llm_output": PASSING_OUTPUT},
+        ]
+
+        response = call(function_app.verify_batch, {"items": items})
+        results = json.loads(response.get_body())["results"]
+
+        assert response.status_code == 200
+        assert results[0]["parsed_data"]["egfr"] == 123456789012345678901234
+        assert results[1]["verified"] == True
+
+    @pytest.mark.parametrize("body", [{}, {"items": []}, {"items": {"llm_output": "x"}}])
+    def test_items_must_be_non_empty_list(self, body):
+        """Test that items must be a non-empty list"""
+        response = call(function_app.verify_batch, body)
+
+        assert response.status_code == 400
+        assert json_body(response) == {"error": "items must be a non-empty list"}
+
+    def test_max_batch_items(self, monkeypatch):
+        """Test that batches over MAX_BATCH_ITEMS are rejected"""
+        monkeypatch.setattr(function_app, "MAX_BATCH_ITEMS", 2)
+        items = [{"llm_output": PASSING_OUTPUT}] * 3
+
+        response = call(function_app.verify_batch, {"items": items})
+
+        assert response.status_code == 400
+        assert json_body(response) == {"error": "items exceeds the maximum of 2"}
+        assert call(function_app.verify_batch, {"items": items[:2]}).status_code == 200
+
+    @pytest.mark.parametrize("body", [b"{not json", b"[1, 2]", b"null"])
+    def test_non_object_body(self, body):
+        """Test that malformed and non-object bodies are rejected"""
+        response = call(function_app.verify_batch, body)
+
+        assert response.status_code == 400
+        assert json_body(response) == {"error": "Invalid JSON in request body"}
+
+    def test_cors_headers(self):
+        """Test that batch responses and preflights carry CORS headers"""
+        response = call(
+            function_app.verify_batch, {"items": [{"llm_output": PASSING_OUTPUT}]},
+            origin="http://localhost:8000"
+        )
+        preflight = call(function_app.verify_batch, method="OPTIONS", origin="http://localhost:8000")
+
+        assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:8000"
+        assert preflight.status_code == 200
+        assert preflight.headers["Access-Control-Allow-Origin"] == "http://localhost:8000"
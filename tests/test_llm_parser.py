@@ -0,0 +1,158 @@
+"""
+Tests for LLM parser
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add handlers to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from aare_core import LLMParser as CoreLLMParser
+from handlers.llm_parser import LLMParser
+from handlers.ontology_loader import OntologyLoader, _compile_extractors
+
+ONTOLOGY_DIR = os.path.join(os.path.dirname(__file__), '..', 'ontologies')
+
+
+class TestLLMParser:
+    """Test cases for LLMParser"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.parser = LLMParser()
+        self.ontology = OntologyLoader(ONTOLOGY_DIR).load("mortgage-compliance-v1")
+
+    def test_extractors_precompiled(self):
+        """Test that pattern extractors carry compiled regexes"""
+        extractors = self.ontology["extractors"]
+
+        assert extractors["dti"]["_compiled"].search("dti: 35")
+        assert "_compiled" not in extractors["has_guarantee"]
+
+    def test_parse_numeric_fields(self):
+        """Test numeric extraction through compiled regexes"""
+        text = "DTI: 35, FICO: 720, you are approved with $1,500 fees."
+
+        result = self.parser.parse(text, self.ontology)
+
+        assert result["dti"] == 35.0
+        assert result["credit_score"] == 720
+        assert result["fees"] == 1500
+        assert result["has_approval"] == True
+
+    def test_matches_core_parser(self):
+        """Test that results match the aare-core parser"""
+        text = "DTI: 45.5, credit score 640, $5,000 fees. Guaranteed approval, no counseling needed."
+
+        assert self.parser.parse(text, self.ontology) == CoreLLMParser().parse(text, self.ontology)
+
+    def test_keyword_automaton_matches_core_parser(self):
+        """Test that single-pass keyword matching agrees with aare-core"""
+        hipaa = OntologyLoader(ONTOLOGY_DIR).load("hipaa-v1")
+        texts = [
+            "Patient name: Jane Doe was seen today.",
+            "The redacted record for Jane Doe was shared.",
+            "Mr. Smith, de-identified per policy, returned for follow-up.",
+            "No identifiers are included.",
+        ]
+
+        assert "_keyword_automaton" in hipaa
+        for text in texts:
+            assert self.parser.parse(text, hipaa) == CoreLLMParser().parse(text, hipaa)
+
+    def test_re2_matches_core_parser(self):
+        """Test that RE2 extraction agrees with aare-core on ASCII and non-ASCII text"""
+        pytest.importorskip("re2")
+        texts = [
+            "DTI:\u00a045.5, credit score\u00a0640, $5,000\u00a0fees.",
+            "DTI: 45.5, credit score 640, $5,000 fees.",
+        ]
+
+        assert "_compiled_re2" in self.ontology["extractors"]["dti"]
+        for text in texts:
+            assert self.parser.parse(text, self.ontology) == CoreLLMParser().parse(text, self.ontology)
+
+    def test_re2_skips_constructs_that_differ(self):
+        """Test that patterns and text RE2 treats differently stay on `re`"""
+        pytest.importorskip("re2")
+        ontology = {
+            "extractors": {
+                "total": {"type": "int", "pattern": r"total: (\d+)$"},
+                "fees": {"type": "money", "pattern": r"fees?[:\s]+\$?([\d,]+)"},
+                "score": {"type": "int", "pattern": r"score\D{,3}(\d+)"},
+                "digit": {"type": "int", "pattern": r"[[:digit:]]+(\d)"}
+            }
+        }
+        _compile_extractors(ontology)
+        texts = [
+            "Total: 5\n",
+            "Fees:\x0b$1,500",
+            "Fees: $1,500, total: 7",
+            "score: 720",
+            "Digits: t]4, 42",
+        ]
+
+        assert "_compiled_re2" not in ontology["extractors"]["total"]
+        assert "_compiled_re2" not in ontology["extractors"]["score"]
+        assert "_compiled_re2" not in ontology["extractors"]["digit"]
+        assert "_compiled_re2" in ontology["extractors"]["fees"]
+        for text in texts:
+            assert self.parser.parse(text, ontology) == CoreLLMParser().parse(text, ontology)
+
+    def test_re2_source_text_not_rescanned(self):
+        """Test that the confidence pass reuses the RE2 match instead of rescanning with `re`"""
+        pytest.importorskip("re2")
+        ontology = {
+            "extractors": {
+                "tail": {"type": "string", "pattern": r"\d*\d*\d*\d*\d*x|(end)"}
+            }
+        }
+        _compile_extractors(ontology)
+        text = "1" * 80 + " end"
+
+        start = time.perf_counter()
+        result = self.parser.parse(text, ontology, include_confidence=True)
+
+        assert time.perf_counter() - start < 1.0
+        assert result["tail"].value == "end"
+        assert result["tail"].source == "end"
+
+    def test_confidence_matches_core_parser(self):
+        """Test that values, confidences and sources match aare-core"""
+        text = "DTI: 45.5, Credit Score 640, $5,000 Fees. Guaranteed approval, no counseling needed."
+
+        assert (
+            self.parser.parse(text, self.ontology, include_confidence=True)
+            == CoreLLMParser().parse(text, self.ontology, include_confidence=True)
+        )
+
+    def test_keyword_confidence_from_scan(self, monkeypatch):
+        """Test that keyword confidence and source come from the scan and match aare-core"""
+        ontology = {
+            "extractors": {
+                "approval": {
+                    "type": "boolean",
+                    "keywords": ["approved", "guaranteed", "approved", "eligible"],
+                    "negation_words": ["not"]
+                },
+                "counseling": {"type": "boolean", "keywords": ["counseling"]}
+            }
+        }
+        _compile_extractors(ontology)
+        texts = [
+            "You are approved and eligible.",
+            "Not approved, but guaranteed and eligible.",
+            "Nothing to report.",
+        ]
+        expected = [CoreLLMParser().parse(text, ontology, include_confidence=True) for text in texts]
+
+        def rescan(*args):
+            raise AssertionError("keyword text rescanned")
+
+        monkeypatch.setattr(CoreLLMParser, "_calculate_confidence", rescan)
+        monkeypatch.setattr(CoreLLMParser, "_find_source_text", rescan)
+        for text, core_result in zip(texts, expected):
+            assert self.parser.parse(text, ontology, include_confidence=True) == core_result
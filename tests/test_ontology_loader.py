@@ -0,0 +1,197 @@
+"""
+Tests for ontology loader
+"""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+
+from azure.core import MatchConditions
+
+# Add handlers to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from handlers.ontology_loader import OntologyLoader
+from handlers.smt_verifier import SMTVerifier
+
+ONTOLOGY_DIR = os.path.join(os.path.dirname(__file__), '..', 'ontologies')
+
+
+class FakeDownloader:
+    """Stands in for azure.storage.blob.StorageStreamDownloader"""
+
+    def __init__(self, content, etag=None):
+        self.content = content
+        self.properties = SimpleNamespace(etag=etag)
+
+    def readinto(self, stream):
+        stream.write(self.content)
+        return len(self.content)
+
+    def readall(self):
+        return self.content
+
+
+class FakeContainer:
+    """Stands in for azure.storage.blob.ContainerClient"""
+
+    def __init__(self, blobs):
+        self.blobs = blobs
+        self.requests = 0
+        self.downloads = 0
+
+    def download_blob(self, name, etag=None, match_condition=None, **kwargs):
+        from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+        self.requests += 1
+        if name not in self.blobs:
+            raise ResourceNotFoundError(f"{name} not found")
+        content = self.blobs[name]
+        current_etag = f'"{hash(content)}"'
+        if match_condition == MatchConditions.IfModified and etag == current_etag:
+            response = SimpleNamespace(
+                status_code=304, reason="Not Modified", headers={}, text=lambda *args, **kwargs: ""
+            )
+            raise ResourceNotModifiedError(response=response)
+        self.downloads += 1
+        return FakeDownloader(content, current_etag)
+
+
+class TestOntologyLoader:
+    """Test cases for OntologyLoader"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.loader = OntologyLoader(ONTOLOGY_DIR)
+
+    def test_load_bundled_ontology(self):
+        """Test loading an ontology from the ontologies directory"""
+        ontology = self.loader.load("mortgage-compliance-v1")
+
+        assert ontology["name"] == "mortgage-compliance-v1"
+        assert len(ontology["constraints"]) > 0
+
+    def test_load_returns_cached_ontology(self):
+        """Test that repeated loads return the same cached object"""
+        first = self.loader.load("mortgage-compliance-v1")
+        second = self.loader.load("mortgage-compliance-v1")
+
+        assert first is second
+
+    def test_unknown_ontology_not_cached(self):
+        """Test that fallbacks for unknown names do not grow the cache"""
+        ontology = self.loader.load("does-not-exist-v1")
+
+        assert ontology["name"] != "does-not-exist-v1"
+        assert "does-not-exist-v1" not in self.loader._cache
+
+    def test_default_ontology_shared(self):
+        """Test that fallbacks reuse the module-level default ontology"""
+        first = self.loader.load("does-not-exist-v1")
+        second = self.loader.load("also-missing-v1")
+
+        assert first is second
+
+    def test_constraints_compiled_on_load(self):
+        """Test that the compile hook stores Z3 formulas on the ontology"""
+        verifier = SMTVerifier()
+        loader = OntologyLoader(ONTOLOGY_DIR, compile_constraints=verifier.compile_constraints)
+
+        ontology = loader.load("mortgage-compliance-v1")
+
+        compiled = ontology["_compiled_constraints"]
+        assert len(compiled) == len(ontology["constraints"])
+        assert all(c.formula is not None for c in compiled)
+        assert verifier.compile_constraints(ontology) is compiled
+
+    def test_load_from_blob(self):
+        """Test that blob ontologies are preferred over local files"""
+        with open(os.path.join(ONTOLOGY_DIR, "hipaa-v1.json"), "rb") as f:
+            self.loader._container = FakeContainer({"hipaa-v1.json": f.read()})
+
+        ontology = self.loader.load("hipaa-v1")
+
+        assert ontology["name"] == "hipaa-v1"
+        assert "_keyword_automaton" in ontology
+
+    def test_missing_blob_falls_back_to_files(self):
+        """Test that a missing blob falls back to the ontologies directory"""
+        self.loader._container = FakeContainer({})
+
+        ontology = self.loader.load("mortgage-compliance-v1")
+
+        assert ontology["name"] == "mortgage-compliance-v1"
+
+    def test_unknown_ontology_miss_cached(self, monkeypatch):
+        """Test that unknown names skip the blob lookup until the miss expires"""
+        from handlers import ontology_loader
+
+        container = FakeContainer({})
+        self.loader._container = container
+
+        first = self.loader.load("does-not-exist-v1")
+        second = self.loader.load("does-not-exist-v1")
+
+        assert second is first
+        assert container.requests == 1
+
+        monkeypatch.setattr(ontology_loader, "MISS_CACHE_TTL_S", 0)
+        self.loader.load("does-not-exist-v1")
+
+        assert container.requests == 2
+
+    def test_miss_cache_bounded(self, monkeypatch):
+        """Test that the miss cache evicts the least recently used names"""
+        from handlers import ontology_loader
+
+        monkeypatch.setattr(ontology_loader, "MISS_CACHE_SIZE", 2)
+        for name in ("unknown-a", "unknown-b", "unknown-a", "unknown-c"):
+            self.loader.load(name)
+
+        assert list(self.loader._misses) == ["unknown-a", "unknown-c"]
+
+    def test_blob_client_shared(self, monkeypatch):
+        """Test that loaders share one pooled blob client"""
+        from handlers import ontology_loader
+
+        monkeypatch.setenv(
+            "AZURE_STORAGE_CONNECTION_STRING",
+            "DefaultEndpointsProtocol=https;AccountName=test;AccountKey=dGVzdA==;EndpointSuffix=core.windows.net"
+        )
+        monkeypatch.setattr(ontology_loader, "_BLOB_CLIENT", None)
+
+        first = OntologyLoader(ONTOLOGY_DIR)
+        second = OntologyLoader(ONTOLOGY_DIR)
+
+        client = ontology_loader._BLOB_CLIENT
+        assert client is not None
+        assert ontology_loader._get_blob_client() is client
+        assert first._container.account_name == second._container.account_name == "test"
+
+    def test_list_available_includes_manifest(self, caplog):
+        """Test that manifest names are listed and re-downloaded only when changed"""
+        container = FakeContainer({"manifest.json": b'{"ontologies": ["custom-policy-v1"]}'})
+        self.loader._container = container
+
+        first = self.loader.list_available()
+        second = self.loader.list_available()
+
+        assert "custom-policy-v1" in first
+        assert "mortgage-compliance-v1" in first
+        assert second == first
+        assert container.requests == 2
+        assert container.downloads == 1
+        assert not [r for r in caplog.records if r.levelname == "WARNING"]
+
+        container.blobs["manifest.json"] = b'{"ontologies": ["other-policy-v2"]}'
+        third = self.loader.list_available()
+
+        assert "other-policy-v2" in third
+        assert "custom-policy-v1" not in third
+        assert container.downloads == 2
+
+    def test_list_available_without_manifest(self):
+        """Test that a missing manifest lists only local ontologies"""
+        self.loader._container = FakeContainer({})
+
+        assert self.loader.list_available() == OntologyLoader(ONTOLOGY_DIR).list_available()
@@ -5,11 +5,16 @@ Tests for SMT verifier
 import pytest
 import sys
 import os
+import time
 
 # Add handlers to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from handlers.smt_verifier import SMTVerifier
+from z3 import Context, Distinct, Int, Solver
+
+from aare_core import SMTVerifier as CoreSMTVerifier
+from handlers import smt_verifier
+from handlers.smt_verifier import CachedSolver, SMTVerifier, SolverTimeout, _watchdog
 
 
 class TestSMTVerifier:
@@ -180,6 +185,264 @@ class TestSMTVerifier:
         assert "proof" in result
         assert result["proof"]["method"] == "Z3 SMT Solver"
 
+    def test_solver_reused_across_requests(self):
+        """Test that one cached solver serves repeated verifications"""
+        passing = {
+            "dti": 40,
+            "compensating_factors": 0,
+            "has_guarantee": False,
+            "has_approval": True
+        }
+        failing = dict(passing, dti=50)
+
+        first = self.verifier.verify(passing, self.mortgage_ontology)
+        second = self.verifier.verify(failing, self.mortgage_ontology)
+        third = self.verifier.verify(passing, self.mortgage_ontology)
+
+        assert len(self.verifier._solver_cache) == 1
+        assert first["verified"] == True
+        assert second["verified"] == False
+        assert third["verified"] == True
+
+    def test_repeated_verification_cached(self):
+        """Test that identical inputs are answered from the result cache"""
+        data = {
+            "dti": 50,
+            "compensating_factors": 0,
+            "has_guarantee": False,
+            "has_approval": True
+        }
+
+        first = self.verifier.verify(data, self.mortgage_ontology)
+        self.verifier._solver_cache.clear()
+        time.sleep(0.01)
+        second = self.verifier.verify(dict(reversed(list(data.items()))), self.mortgage_ontology)
+
+        assert second["violations"] == first["violations"]
+        assert second["execution_time_ms"] == 0
+        assert second["proof"]["results"] == first["proof"]["results"]
+        assert second["proof"]["timestamp"] > first["proof"]["timestamp"]
+        assert len(self.verifier._solver_cache) == 0
+
+    def test_result_cache_distinguishes_value_types(self):
+        """Test that True and 1 are cached under different keys"""
+        self.verifier.verify({"dti": 1}, self.mortgage_ontology)
+        self.verifier.verify({"dti": True}, self.mortgage_ontology)
+
+        assert len(self.verifier._result_cache) == 2
+
+    def test_timeout_response(self, monkeypatch):
+        """Test that a timed-out verification is reported and not cached"""
+        data = {"dti": 40, "compensating_factors": 0, "has_guarantee": False, "has_approval": True}
+
+        def timeout(cached, data):
+            raise SolverTimeout("timeout")
+
+        monkeypatch.setattr(self.verifier, "_check_tracked", timeout)
+        result = self.verifier.verify(data, self.mortgage_ontology)
+
+        assert result["verified"] == False
+        assert result["violations"] == []
+        assert result["proof"] == "timeout"
+        assert "execution_time_ms" in result
+        assert len(self.verifier._result_cache) == 0
+
+    def test_watchdog_interrupts_check(self):
+        """Test that the watchdog stops a long check with SolverTimeout"""
+        ctx = Context()
+        cached = CachedSolver(ctx=ctx, solver=Solver(ctx=ctx), constraints=[])
+        # Pigeonhole: 40 distinct values in 39 slots, slow to refute
+        xs = [Int(f"x{i}", ctx) for i in range(40)]
+        cached.solver.push()
+        for x in xs:
+            cached.solver.add(x >= 0, x < 39)
+        cached.solver.add(Distinct(*xs))
+
+        with pytest.raises(SolverTimeout):
+            with _watchdog(cached, 50):
+                self.verifier._check(cached.solver)
+
+        # Scopes are popped and the context is usable again
+        assert cached.solver.num_scopes() == 0
+        cached.solver.push()
+        cached.solver.pop()
+
+    def test_watchdog_interrupts_between_checks(self, monkeypatch):
+        """Test that an interrupt between checks times out and leaves pooled solvers usable"""
+        data = {"dti": 50, "compensating_factors": 0, "has_guarantee": False, "has_approval": True}
+        check_tracked = self.verifier._check_tracked
+
+        def slow_check_tracked(cached, data):
+            time.sleep(0.2)
+            return check_tracked(cached, data)
+
+        monkeypatch.setattr(smt_verifier, "SMT_TIMEOUT_MS", 20)
+        monkeypatch.setattr(self.verifier, "_check_tracked", slow_check_tracked)
+        result = self.verifier.verify(data, self.mortgage_ontology)
+
+        assert result["proof"] == "timeout"
+
+        monkeypatch.undo()
+        for _ in range(smt_verifier.POOL_SIZE + 1):
+            result = self.verifier.verify(dict(data, dti=51), self.mortgage_ontology)
+            self.verifier._result_cache.clear()
+            assert result["verified"] == False
+            assert result["violations"][0]["model"] is not None
+
+    def test_prewarm_builds_solver(self):
+        """Test that prewarming caches the solver before the first request"""
+        self.verifier.prewarm(self.mortgage_ontology)
+
+        assert ("mortgage-compliance-v1", "1.0.0") in self.verifier._solver_cache
+
+    def test_concurrent_verification(self):
+        """Test that pooled solvers give consistent results across threads"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        passing = {
+            "dti": 40,
+            "compensating_factors": 0,
+            "has_guarantee": False,
+            "has_approval": True
+        }
+        failing = dict(passing, dti=50)
+        inputs = [passing, failing] * 20
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda data: self.verifier.verify(data, self.mortgage_ontology), inputs
+            ))
+
+        assert [r["verified"] for r in results] == [True, False] * 20
+
+    def test_verify_batch_matches_single(self):
+        """Test that batch verification agrees with one-at-a-time verification"""
+        passing = {
+            "dti": 40,
+            "compensating_factors": 0,
+            "has_guarantee": False,
+            "has_approval": True
+        }
+        items = [
+            passing,
+            dict(passing, dti=50),
+            dict(passing, has_guarantee=True),
+            {"dti": 40}
+        ]
+
+        batch = self.verifier.verify_batch(items, self.mortgage_ontology)
+
+        assert len(batch) == len(items)
+        for data, result in zip(items, batch):
+            single = self.verifier.verify(data, self.mortgage_ontology)
+            assert result["verified"] == single["verified"]
+            assert result["violations"] == single["violations"]
+            assert result.get("warnings") == single.get("warnings")
+
+    def test_verify_batch_same_name_different_sorts(self, monkeypatch):
+        """Test that batch renaming keeps a variable's sort per constraint"""
+        ontology = {
+            "name": "mixed-sorts-v1",
+            "version": "1.0.0",
+            "constraints": [
+                {
+                    "id": "SCORE_INT",
+                    "description": "Integer score limit",
+                    "formula": {"<=": ["score", 10]},
+                    "variables": [{"name": "score", "type": "int"}]
+                },
+                {
+                    "id": "SCORE_REAL",
+                    "description": "Real score limit",
+                    "formula": {"<=": ["score", 5]},
+                    "variables": [{"name": "score", "type": "real"}]
+                }
+            ]
+        }
+        items = [{"score": 3}, {"score": 7}, {"score": 12}]
+
+        batch = self.verifier.verify_batch(items, ontology)
+
+        for data, result in zip(items, batch):
+            single = self.verifier.verify(data, ontology)
+            assert result["violations"] == single["violations"]
+            assert all("error_details" not in v for v in result["violations"])
+
+        # A float bound to the int variable makes the shared check inconclusive;
+        # only that item falls back to single-item checking
+        items.insert(1, {"score": 2.5})
+        check_tracked_calls = []
+        check_tracked = self.verifier._check_tracked
+
+        def counting_check_tracked(cached, data):
+            check_tracked_calls.append(data)
+            return check_tracked(cached, data)
+
+        monkeypatch.setattr(self.verifier, "_check_tracked", counting_check_tracked)
+        batch = self.verifier.verify_batch(items, ontology)
+
+        assert check_tracked_calls == [{"score": 2.5}]
+        for data, result in zip(items, batch):
+            single = self.verifier.verify(data, ontology)
+            assert result["violations"] == single["violations"]
+
+    def test_missing_denominator_matches_core(self):
+        """Test that ratios over a missing (zero) denominator are checked like aare-core"""
+        def ratio_constraint(constraint_id, op):
+            return {
+                "id": constraint_id,
+                "description": "Debt-to-income ratio",
+                "formula": {op: [{"/": ["debt", "income"]}, 0.43]},
+                "variables": [{"name": "debt", "type": "real"}, {"name": "income", "type": "real"}]
+            }
+
+        ontology = {
+            "name": "ratio-v1",
+            "version": "1.0.0",
+            "constraints": [ratio_constraint("RATIO", "<="), ratio_constraint("RATIO2", ">=")]
+        }
+        items = [{"debt": 10}, {"debt": 10, "income": 100}, {"debt": 50, "income": 100}]
+
+        batch = self.verifier.verify_batch(items, ontology)
+
+        for data, result in zip(items, batch):
+            expected = CoreSMTVerifier().verify(data, ontology)
+            single = self.verifier.verify(data, ontology)
+            expected_ids = [v["constraint_id"] for v in expected["violations"]]
+            assert [v["constraint_id"] for v in single["violations"]] == expected_ids
+            assert [v["constraint_id"] for v in result["violations"]] == expected_ids
+        assert [v["constraint_id"] for v in batch[0]["violations"]] == ["RATIO", "RATIO2"]
+
+    def test_non_boolean_formulas_match_core(self):
+        """Test that constant and non-Boolean formulas are checked like aare-core"""
+        ontology = {
+            "name": "constant-v1",
+            "version": "1.0.0",
+            "constraints": [
+                {
+                    "id": "CONSTANT",
+                    "description": "Always holds",
+                    "formula": {"<=": [1, 2]},
+                    "variables": []
+                },
+                {
+                    "id": "ARITHMETIC",
+                    "description": "Not a Boolean formula",
+                    "formula": {"+": ["debt", 1]},
+                    "variables": [{"name": "debt", "type": "int"}]
+                }
+            ]
+        }
+        data = {"debt": 10}
+
+        expected = CoreSMTVerifier().verify(data, ontology)
+        single = self.verifier.verify(data, ontology)
+        batch = self.verifier.verify_batch([data, data], ontology)
+
+        assert [v["constraint_id"] for v in expected["violations"]] == ["ARITHMETIC"]
+        for result in [single] + batch:
+            assert result["violations"] == expected["violations"]
+
 
 class TestMedicalOntology:
     """Test cases for medical safety ontology"""
@@ -284,3 +547,22 @@ class TestMedicalOntology:
 
         assert result["verified"] == False
         assert any(v["constraint_id"] == "DRUG_INTERACTION" for v in result["violations"])
+
+    def test_proof_model_matches_core(self):
+        """Test that proof models list only the violated constraint's variables, like aare-core"""
+        data = {
+            "egfr": 30,
+            "recommends_metformin": True,
+            "ace_inhibitor": True,
+            "potassium_sparing": True
+        }
+
+        result = self.verifier.verify(data, self.medical_ontology)
+        expected = CoreSMTVerifier().verify(data, self.medical_ontology)
+
+        models = [proof["model"] for proof in result["proof"]["results"]]
+        expected_models = [proof["model"] for proof in expected["proof"]["results"]]
+        assert models[1] == expected_models[1]
+        # Z3 may list the variables of a fresh solver's model in another order
+        for model, expected_model in zip(models, expected_models):
+            assert sorted(model.strip("[]").split(", ")) == sorted(expected_model.strip("[]").split(", "))